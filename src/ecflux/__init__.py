@@ -5,6 +5,7 @@ A lightweight package for basic eddy covariance flux computations
 
 Main user-facing functions:
     - ecflux(): Calculate turbulent fluxes (sensible heat, latent heat, momentum)
+    - ecflux_all(): Calculate all three fluxes in a single pass over the data
     - tke(): Calculate turbulent kinetic energy
 
 Lower-level functions (for advanced users and QAQC modules):
@@ -16,19 +17,20 @@ from __future__ import annotations
 __version__ = "0.1.0"
 
 # Main user-facing API
-from .flux import ecflux, tke
+from .flux import ecflux, ecflux_all, tke
 
 # Lower-level functions (available for advanced use and QAQC)
 from .eddy import fluctuations
 from .covariance import covariance_flux
 
-# For backwards compatibility (will be deprecated)
+# For backwards compatibility (deprecated, use ecflux())
 from .heat import sensible_heat_flux
 from .momentum import momentum_flux
 
 __all__ = [
     # Primary user API
     "ecflux",
+    "ecflux_all",
     "tke",
     # Lower-level functions
     "fluctuations",
@@ -4,18 +4,36 @@ Generic covariance flux calculations.
 """
 from __future__ import annotations
 
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 import numpy as np
+import numpy.typing as npt
 import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+try:
+    import polars as pl
+except ImportError:  # optional dependency, only needed for engine='polars'
+    pl = None
 
 __all__ = ["covariance_flux"]
 
+ENGINES = ('numpy', 'pandas', 'polars', 'numba')
+
 
 def covariance_flux(
     df: pd.DataFrame,
     vertical_var: str,
     scalar_var: str,
     freq: str = '30T',
-    scale_factor: float = 1.0
+    scale_factor: float = 1.0,
+    engine: str = 'numpy',
+    numerically_stable: bool = False,
+    dtype: npt.DTypeLike = np.float64,
+    n_jobs: int = 1
 ) -> pd.Series:
     """
     Compute turbulent flux as covariance between vertical wind and any scalar.
@@ -29,6 +47,23 @@ def covariance_flux(
         scalar_var: Column name for scalar quantity (e.g., 'T', 'q', 'CO2')
         freq: Time window for averaging (e.g., '30T' for 30 minutes)
         scale_factor: Multiplicative factor for unit conversion (e.g., rho*cp for heat flux)
+        engine: Backend used for the window averages:
+                - 'numpy': per-window sums with np.add.reduceat (default)
+                - 'pandas': resample-based; calendar frequencies such as
+                  'ME' always use this engine
+                - 'polars': multi-threaded group_by over window ids (requires polars)
+                - 'numba': parallel JIT-compiled kernel (requires numba)
+        numerically_stable: If True, remove the window means before forming
+                            <wc> - <w><c>. Costs an extra pass over the data;
+                            only needed when the means are large relative to
+                            the fluctuations.
+        dtype: Floating-point type the variables are cast to before averaging.
+               np.float32 halves the memory of that working copy and is
+               ample for sonic anemometer data; window sums still
+               accumulate in float64 with every engine.
+        n_jobs: Number of threads splitting the windows for engine='numpy'
+                (-1 uses all cores). The polars and numba engines are
+                multi-threaded on their own.
     
     Returns:
         Series of flux values indexed by time window
@@ -43,15 +78,451 @@ def covariance_flux(
         >>> # CO2 flux
         >>> Fc = covariance_flux(df, 'w', 'CO2', freq='30T')
     """
-    df = df[[vertical_var, scalar_var]].dropna()
+    flux, = _window_covariances(
+        df, [(vertical_var, scalar_var)], freq, scale=scale_factor,
+        engine=engine, numerically_stable=numerically_stable, dtype=dtype,
+        n_jobs=n_jobs
+    )
+    flux.name = f"{scalar_var}_flux"
     
-    def compute_window_covariance(g):
-        """Compute covariance for a single time window."""
-        w_prime = g[vertical_var] - g[vertical_var].mean()
-        c_prime = g[scalar_var] - g[scalar_var].mean()
-        return np.mean(w_prime * c_prime)
+    return flux
+
+
+# ============================================================================
+# Internal helper functions (shared by the flux calculations)
+# ============================================================================
+
+def _momentum_flux(
+    df: pd.DataFrame,
+    freq: str,
+    u_col: str,
+    v_col: str,
+    w_col: str,
+    rho: float,
+    engine: str = 'numpy',
+    numerically_stable: bool = False,
+    dtype: npt.DTypeLike = np.float64,
+    n_jobs: int = 1
+) -> pd.Series:
+    """
+    Internal: Compute momentum flux (tau) using eddy covariance method.
     
-    flux = df.groupby(pd.Grouper(freq=freq)).apply(compute_window_covariance)
-    flux.name = f"{scalar_var}_flux"
+    tau = rho * sqrt(<u'w'>² + <v'w'>²)
+    """
+    uw_cov, vw_cov = _window_covariances(
+        df, [(u_col, w_col), (v_col, w_col)], freq,
+        engine=engine, numerically_stable=numerically_stable, dtype=dtype,
+        n_jobs=n_jobs
+    )
+    
+    tau_series = rho * np.hypot(uw_cov, vw_cov)
+    tau_series.name = 'tau_N_per_m2'
+    
+    return tau_series
+
+
+def _window_covariances(
+    df: pd.DataFrame,
+    pairs: list[tuple[str, str]],
+    freq: str,
+    scale: float = 1.0,
+    engine: str = 'numpy',
+    numerically_stable: bool = False,
+    dtype: npt.DTypeLike = np.float64,
+    n_jobs: int = 1
+) -> list[pd.Series]:
+    """
+    Internal: Compute scale * <a' b'> in each time window for every (a, b) column pair.
+    
+    Uses <a' b'> = <ab> - <a><b>, so every window is reduced to a handful of
+    means instead of being demeaned in Python. Rows with a missing value in
+    any of the involved columns are masked out of the window sums rather
+    than dropped, so no filtered copy of the data is made. Invalid rows at
+    either end are sliced off, so windows are counted from the first valid
+    row's day, as with the former dropna().
+    
+    The identity loses precision when the window means dwarf the
+    fluctuations. With numerically_stable=True the window means are
+    subtracted first, so the identity is applied to near-zero-mean data.
+    
+    Columns are cast to dtype; the engines keep that storage type for the
+    products and accumulate the window sums in float64.
+    """
+    # Flux records are time-ordered; checking once lets every engine rely on
+    # it (resample's bin generator, searchsorted). pandas caches the result.
+    if not df.index.is_monotonic_increasing:
+        raise ValueError("DataFrame index must be sorted in increasing time order")
+    if not isinstance(n_jobs, (int, np.integer)) or (n_jobs < 1 and n_jobs != -1):
+        raise ValueError(f"n_jobs must be a positive integer or -1, got {n_jobs!r}")
+    
+    columns = list(dict.fromkeys(col for pair in pairs for col in pair))
+    data = df[columns].astype(dtype)
+    # Keep the caller's index object so its cached window bins are reused
+    data.index = df.index
+    valid = data.notna().all(axis=1)
+    
+    # dropna() used to start the record at the first valid row, and resample
+    # counts windows from midnight of that row's day; slice off the invalid
+    # rows at either end so every engine keeps that window grid
+    present = np.flatnonzero(valid.to_numpy())
+    if len(present) == 0:
+        data, valid = data.iloc[:0], valid.iloc[:0]
+    elif present[0] > 0 or present[-1] < len(valid) - 1:
+        keep = slice(present[0], present[-1] + 1)
+        data, valid = data.iloc[keep], valid.iloc[keep]
+    
+    # The binned engines need windows of one fixed length; calendar
+    # frequencies such as 'ME' go through resample instead
+    if engine in ('numpy', 'polars', 'numba') and not _is_fixed_freq(freq, df.index):
+        engine = 'pandas'
+    
+    if numerically_stable:
+        # Demean over the same windows the engine reduces over
+        if engine == 'pandas':
+            data = data - data.astype(np.float64).resample(freq).transform('mean')
+        else:
+            data = _subtract_window_means(data, freq, n_jobs)
+    
+    if engine == 'numpy':
+        means = _window_means_numpy(data, valid.to_numpy(), pairs, freq, n_jobs)
+    elif engine == 'numba':
+        return _window_covariances_numba(data, valid.to_numpy(), pairs, freq, scale)
+    elif engine in ('pandas', 'polars'):
+        # Both skip missing values in their means; blank out partial rows
+        if not valid.all():
+            data = data.where(valid, axis=0)
+        if engine == 'pandas':
+            means = _window_means_pandas(data, pairs, freq)
+        else:
+            means = _window_means_polars(data, pairs, freq)
+    else:
+        raise ValueError(f"Unknown engine: {engine}. Use one of {ENGINES}")
+    
+    return [
+        (means[f"{a}*{b}"] - means[a] * means[b]) * scale for a, b in pairs
+    ]
+
+
+def _window_means_numpy(
+    df: pd.DataFrame,
+    valid: np.ndarray,
+    pairs: list[tuple[str, str]],
+    freq: str,
+    n_jobs: int = 1
+) -> pd.DataFrame:
+    """Internal: Window means of the columns and pair products via np.add.reduceat."""
+    labels, starts, ends = _window_bins(df.index, freq)
+    keys = list(df.columns) + [f"{a}*{b}" for a, b in pairs]
+    
+    # One contiguous row per term: columns, pair products and the valid-row
+    # mask, so a single reduceat sums everything per window
+    columns = list(df.columns)
+    stacked = np.empty((len(keys) + 1, len(df)), dtype=np.result_type(*df.dtypes))
+    for i, col in enumerate(columns):
+        stacked[i] = df[col].to_numpy()
+    if not valid.all():
+        # Zero out masked rows so they drop out of the sums
+        stacked[:len(columns), ~valid] = 0
+    for i, (a, b) in enumerate(pairs, start=len(columns)):
+        np.multiply(stacked[columns.index(a)], stacked[columns.index(b)], out=stacked[i])
+    stacked[-1] = valid
+    
+    sums = _window_sums(stacked, starts, ends, n_jobs)
+    
+    # Windows without valid rows average to NaN, as resample does
+    counts = sums[:, -1]
+    counts[counts == 0] = np.nan
+    
+    return pd.DataFrame(sums[:, :-1] / counts[:, None], index=labels, columns=keys)
+
+
+def _subtract_window_means(
+    df: pd.DataFrame,
+    freq: str,
+    n_jobs: int = 1
+) -> pd.DataFrame:
+    """Internal: Remove each column's mean over its _window_bins window."""
+    labels, starts, ends = _window_bins(df.index, freq)
+    values = np.ascontiguousarray(df.to_numpy().T)
+    present = ~np.isnan(values)
+    
+    sums = _window_sums(np.where(present, values, 0), starts, ends, n_jobs)
+    counts = _window_sums(present, starts, ends, n_jobs)
+    counts[counts == 0] = np.nan
+    
+    # Spread each window's means back over its rows
+    means = np.repeat(sums / counts, ends - starts, axis=0)
+    demeaned = (values.T - means).astype(values.dtype, copy=False)
+    return pd.DataFrame(demeaned, index=df.index, columns=df.columns)
+
+
+def _window_sums(
+    x: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    n_jobs: int = 1
+) -> np.ndarray:
+    """
+    Internal: Sums of each row of x over each window, accumulated in float64.
+    
+    Returns an array of shape (n_windows, n_rows). np.add.reduceat runs over
+    the non-empty windows only (it would return a sample instead of zero
+    for an empty one). With n_jobs > 1 those windows are split into
+    contiguous chunks reduced in a thread pool; NumPy releases the GIL
+    inside the reduction.
+    """
+    sums = np.zeros((len(starts), x.shape[0]))
+    filled = np.flatnonzero(ends > starts)
+    if len(filled) == 0:
+        return sums
+    
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    chunks = np.array_split(filled, min(n_jobs, len(filled)))
+    
+    def reduce_chunk(chunk: np.ndarray) -> None:
+        lo, hi = starts[chunk[0]], ends[chunk[-1]]
+        sums[chunk] = np.add.reduceat(x[:, lo:hi], starts[chunk] - lo, axis=1,
+                                      dtype=np.float64).T
+    
+    if len(chunks) == 1:
+        reduce_chunk(chunks[0])
+    else:
+        with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+            list(pool.map(reduce_chunk, chunks))
+    return sums
+
+
+def _window_means_pandas(
+    df: pd.DataFrame,
+    pairs: list[tuple[str, str]],
+    freq: str
+) -> pd.DataFrame:
+    """Internal: Window means of the columns and pair products via resample."""
+    # resample averages in the input dtype; upcast so float32 input is
+    # summed in float64 like the other engines
+    df = df.astype(np.float64)
+    products = {f"{a}*{b}": df[a] * df[b] for a, b in pairs}
+    return df.assign(**products).resample(freq).mean()
+
+
+def _window_means_polars(
+    df: pd.DataFrame,
+    pairs: list[tuple[str, str]],
+    freq: str
+) -> pd.DataFrame:
+    """Internal: Window means of the columns and pair products via polars."""
+    if pl is None:
+        raise ImportError("engine='polars' requires the polars package")
+    
+    columns = list(df.columns)
+    labels, starts, ends = _window_bins(df.index, freq)
+    
+    # Group on window numbers from the shared bins rather than on time stamps:
+    # local clock times repeat through the autumn DST change, and
+    # group_by_dynamic would align windows to the epoch instead of midnight
+    window = np.repeat(np.arange(len(labels)), ends - starts)
+    frame = pl.DataFrame({'_window': window})
+    frame = frame.with_columns(
+        [pl.Series(col, df[col].to_numpy(), nan_to_null=True) for col in columns]
+    )
+    aggs = [pl.col(col).cast(pl.Float64).mean() for col in columns] + [
+        (pl.col(a) * pl.col(b)).cast(pl.Float64).mean().alias(f"{a}*{b}")
+        for a, b in pairs
+    ]
+    result = frame.lazy().group_by('_window').agg(aggs).collect()
+    
+    # Empty windows have no group; reindex to every window as resample does
+    means = pd.DataFrame(
+        {col: result[col].to_numpy() for col in result.columns[1:]},
+        index=result['_window'].to_numpy(),
+    ).reindex(np.arange(len(labels)))
+    means.index = labels
+    return means
+
+
+def _window_covariances_numba(
+    df: pd.DataFrame,
+    valid: np.ndarray,
+    pairs: list[tuple[str, str]],
+    freq: str,
+    scale: float = 1.0
+) -> list[pd.Series]:
+    """Internal: Window covariances from the compiled numba kernels."""
+    labels, starts, ends = _window_bins(df.index, freq)
+    arrays = {col: np.ascontiguousarray(df[col].to_numpy()) for col in df.columns}
+    
+    # Windows start at the edges from _window_labels, not at the first
+    # sample, so the first and last are often partial. Only when every
+    # window holds the same number of samples and no row is masked does the
+    # record reshape into (n_windows, window_size) rows for the kernel
+    # specialized for that length.
+    lengths = ends - starts
+    window_size = int(lengths[0]) if len(lengths) else 0
+    fixed = window_size > 0 and (lengths == window_size).all() and valid.all()
+    if fixed:
+        kernel = _numba_fixed_window_kernel(window_size)
+    else:
+        kernel = _numba_cov_kernel()
+    
+    covariances = []
+    for a, b in pairs:
+        out = np.empty(len(labels))
+        if fixed:
+            kernel(arrays[a].reshape(-1, window_size),
+                   arrays[b].reshape(-1, window_size), scale, out)
+        else:
+            kernel(arrays[a], arrays[b], valid, starts, ends, scale, out)
+        covariances.append(pd.Series(out, index=labels))
+    return covariances
+
+
+class _IndexKey:
+    """
+    Internal: Key an lru_cache on a pandas Index by identity.
+    
+    Only a weak reference is kept, so a cached entry doesn't keep a large
+    index alive. Once the index is freed its key matches nothing, even if
+    a new index reuses the same id.
+    """
+    
+    __slots__ = ('ref', 'hash')
+    
+    def __init__(self, index: pd.Index):
+        self.ref = weakref.ref(index)
+        self.hash = id(index)
+    
+    def __hash__(self) -> int:
+        return self.hash
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, _IndexKey):
+            return False
+        index = self.ref()
+        return index is not None and index is other.ref()
+
+
+def _window_bins(
+    index: pd.DatetimeIndex,
+    freq: str
+) -> tuple[pd.DatetimeIndex, np.ndarray, np.ndarray]:
+    """
+    Internal: Window labels with the start and end sample position of each window.
+    
+    Results are cached per (index object, freq), so computing H, LE and tau
+    on the same DataFrame locates the window boundaries only once.
+    """
+    return _cached_window_bins(_IndexKey(index), freq)
+
+
+@lru_cache(maxsize=4)
+def _cached_window_bins(
+    key: _IndexKey,
+    freq: str
+) -> tuple[pd.DatetimeIndex, np.ndarray, np.ndarray]:
+    # Only called from _window_bins, which holds the index alive
+    index = key.ref()
+    labels = _window_labels(index, freq)
+    starts, ends = _window_bounds(index, labels)
+    starts.flags.writeable = False
+    ends.flags.writeable = False
+    return labels, starts, ends
+
+
+def _is_fixed_freq(freq: str, index: pd.DatetimeIndex) -> bool:
+    """Internal: Whether freq windows have one fixed duration on this index."""
+    offset = to_offset(freq)
+    if isinstance(offset, pd.offsets.Tick):
+        return True
+    # Days are 24h only without a time zone (DST days are 23h or 25h)
+    return isinstance(offset, pd.offsets.Day) and index.tz is None
+
+
+def _window_labels(index: pd.DatetimeIndex, freq: str) -> pd.DatetimeIndex:
+    """
+    Internal: Left edges of all time windows spanned by a sorted index.
+    
+    Windows are counted from midnight of the first day, the same origin
+    resample uses, so a freq that does not divide 24h still gives the
+    same windows as engine='pandas'.
+    """
+    if len(index) == 0:
+        return pd.DatetimeIndex([], dtype=index.dtype, freq=freq)
+    step = pd.Timedelta(to_offset(freq).nanos)
+    origin = index[0].normalize()
+    start = origin + (index[0] - origin) // step * step
+    return pd.date_range(start, index[-1], freq=freq, unit=index.unit)
+
+
+def _window_bounds(
+    index: pd.DatetimeIndex,
+    labels: pd.DatetimeIndex
+) -> tuple[np.ndarray, np.ndarray]:
+    """Internal: Start and end sample positions of each window in a sorted index."""
+    starts = np.searchsorted(index.values, labels.values)
+    ends = np.append(starts[1:], len(index))
+    return starts, ends
+
+
+def _import_numba():
+    """Internal: Import the numba decorators, which are an optional dependency."""
+    try:
+        from numba import njit, prange
+    except ImportError:
+        raise ImportError("engine='numba' requires the numba package") from None
+    return njit, prange
+
+
+@lru_cache(maxsize=None)
+def _numba_cov_kernel():
+    """Internal: Compile (once) the per-window covariance kernel."""
+    njit, prange = _import_numba()
+    
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _cov_by_window(w, c, valid, starts, ends, scale, out):
+        for i in prange(len(starts)):
+            # Single pass over the valid rows: <wc> - <w><c>
+            n = 0
+            sw = 0.0
+            sc = 0.0
+            swc = 0.0
+            for j in range(starts[i], ends[i]):
+                if valid[j]:
+                    n += 1
+                    sw += w[j]
+                    sc += c[j]
+                    swc += w[j] * c[j]
+            if n == 0:
+                out[i] = np.nan
+            else:
+                out[i] = (swc / n - (sw / n) * (sc / n)) * scale
+    
+    return _cov_by_window
+
+
+@lru_cache(maxsize=None)
+def _numba_fixed_window_kernel(window_size: int):
+    """
+    Internal: Compile (once per window_size) a covariance kernel for full windows.
+    
+    The kernel takes (n_windows, window_size) arrays with no missing values
+    and writes scale * <x'y'> for each row. window_size is frozen into the
+    compiled code as a constant, so numba can unroll and vectorize the
+    inner loop.
+    """
+    njit, prange = _import_numba()
+    n = window_size
+    
+    @njit(parallel=True, fastmath=True)
+    def _cov_fixed_window(x, y, scale, out):
+        for i in prange(x.shape[0]):
+            sx = 0.0
+            sy = 0.0
+            sxy = 0.0
+            for j in range(n):
+                sx += x[i, j]
+                sy += y[i, j]
+                sxy += x[i, j] * y[i, j]
+            out[i] = (sxy / n - (sx / n) * (sy / n)) * scale
     
-    return flux * scale_factor
+    return _cov_fixed_window
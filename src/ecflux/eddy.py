@@ -32,11 +32,16 @@ def fluctuations(df: pd.DataFrame, columns: list[str] | None = None) -> pd.DataF
     if columns is None:
         columns = df.select_dtypes(include='number').columns.tolist()
     
-    df_prime = pd.DataFrame(index=df.index)
+    # Validate against one set of column names instead of probing the index per column
+    available = set(df.columns)
+    missing = [col for col in columns if col not in available]
+    if missing:
+        raise ValueError(f"Columns {missing} not found in DataFrame")
     
-    for col in columns:
-        if col not in df.columns:
-            raise ValueError(f"Column '{col}' not found in DataFrame")
-        df_prime[f"{col}_prime"] = df[col] - df[col].mean()
-    
-    return df_prime
+    # Build the frame in one go instead of inserting a column at a time.
+    # Series.mean skips NaNs quietly (an all-NaN column gives NaN), and
+    # float32 columns stay float32.
+    return pd.DataFrame(
+        {f"{col}_prime": df[col] - df[col].mean() for col in columns},
+        index=df.index,
+    )
@@ -6,9 +6,16 @@ These are the main functions users should call.
 from __future__ import annotations
 
 import numpy as np
+import numpy.typing as npt
 import pandas as pd
+from .covariance import (
+    covariance_flux,
+    _momentum_flux,
+    _numba_fixed_window_kernel,
+    _window_covariances,
+)
 
-__all__ = ["ecflux", "tke"]
+__all__ = ["ecflux", "ecflux_all", "tke"]
 
 
 def ecflux(
@@ -20,6 +27,10 @@ def ecflux(
     rho: float = 1.2,
     cp: float = 1005.0,
     Lv: float = 2.5e6,
+    engine: str = 'numpy',
+    numerically_stable: bool = False,
+    dtype: npt.DTypeLike = np.float64,
+    n_jobs: int = 1,
     **kwargs
 ) -> pd.Series:
     """
@@ -42,6 +53,13 @@ def ecflux(
         rho: Air density (kg/m³), default 1.2
         cp: Specific heat capacity of air (J/kg/K), default 1005
         Lv: Latent heat of vaporization (J/kg), default 2.5e6
+        engine: Backend for the window averages, 'numpy' (default), 'pandas',
+                'polars' or 'numba' (see covariance_flux)
+        numerically_stable: If True, remove window means before forming
+                            covariances (see covariance_flux)
+        dtype: Floating-point type for the input data, e.g. np.float32 to
+               halve the memory of the working copy (see covariance_flux)
+        n_jobs: Number of threads for engine='numpy' (-1 uses all cores)
         **kwargs: Additional arguments passed to specific flux calculations
                   For Tau: u='u', v='v' (horizontal wind components)
     
@@ -58,28 +76,74 @@ def ecflux(
         >>> # Momentum flux
         >>> tau = ecflux(df, w='W_m_s', flux='Tau', freq='30T', u='U_m_s', v='V_m_s')
     """
-    flux = flux.upper()
-    
-    if flux == 'H':
-        # Sensible heat flux: H = rho * cp * <w' T'>
-        if scalar is None:
-            raise ValueError("scalar (temperature) must be specified for sensible heat flux")
-        return _sensible_heat_flux(raw_df, freq, scalar, w, rho, cp)
-    
-    elif flux in ('L', 'LE'):
-        # Latent heat flux: LE = rho * Lv * <w' q'>
-        if scalar is None:
-            raise ValueError("scalar (specific humidity) must be specified for latent heat flux")
-        return _latent_heat_flux(raw_df, freq, scalar, w, rho, Lv)
-    
-    elif flux == 'TAU':
-        # Momentum flux: tau = rho * sqrt(<u'w'>² + <v'w'>²)
-        u_col = kwargs.get('u', 'u')
-        v_col = kwargs.get('v', 'v')
-        return _momentum_flux(raw_df, freq, u_col, v_col, w, rho)
-    
-    else:
+    compute = _DISPATCH.get(flux.upper())
+    if compute is None:
         raise ValueError(f"Unknown flux type: {flux}. Use 'H', 'L'/'LE', or 'Tau'")
+    
+    options = dict(engine=engine, numerically_stable=numerically_stable,
+                   dtype=dtype, n_jobs=n_jobs)
+    return compute(raw_df, freq, w=w, scalar=scalar, rho=rho, cp=cp, Lv=Lv,
+                   options=options, **kwargs)
+
+
+def ecflux_all(
+    raw_df: pd.DataFrame,
+    w: str = 'w',
+    T: str = 'T',
+    q: str = 'q',
+    u: str = 'u',
+    v: str = 'v',
+    freq: str = '30T',
+    rho: float = 1.2,
+    cp: float = 1005.0,
+    Lv: float = 2.5e6,
+    engine: str = 'numpy',
+    numerically_stable: bool = False,
+    dtype: npt.DTypeLike = np.float64,
+    n_jobs: int = 1
+) -> pd.DataFrame:
+    """
+    Compute sensible heat, latent heat and momentum fluxes in one pass.
+    
+    All window averages come from a single reduction, so the data is read
+    once instead of three times. Rows with a missing value in any of the
+    five columns are left out of all three fluxes, so with gaps the results
+    can differ from separate ecflux() calls for 'H', 'LE' and 'Tau', which
+    each drop only rows missing their own columns. On gap-free data they
+    match.
+    
+    Args:
+        raw_df: DataFrame with datetime index containing raw high-frequency data
+        w: Column name for vertical wind velocity (m/s)
+        T: Column name for temperature
+        q: Column name for specific humidity
+        u: Column name for u-component (east-west wind, m/s)
+        v: Column name for v-component (north-south wind, m/s)
+        freq: Time window for averaging (e.g., '30T' for 30 minutes)
+        rho: Air density (kg/m³), default 1.2
+        cp: Specific heat capacity of air (J/kg/K), default 1005
+        Lv: Latent heat of vaporization (J/kg), default 2.5e6
+        engine, numerically_stable, dtype, n_jobs: As for ecflux()
+    
+    Returns:
+        DataFrame indexed by time window with columns
+        'H_W_per_m2', 'LE_W_per_m2' and 'tau_N_per_m2'
+    
+    Examples:
+        >>> fluxes = ecflux_all(df, w='W_m_s', T='T_C', q='q', u='U_m_s', v='V_m_s')
+        >>> fluxes['H_W_per_m2']
+    """
+    wT, wq, uw, vw = _window_covariances(
+        raw_df, [(w, T), (w, q), (u, w), (v, w)], freq,
+        engine=engine, numerically_stable=numerically_stable, dtype=dtype,
+        n_jobs=n_jobs
+    )
+    
+    return pd.DataFrame({
+        'H_W_per_m2': rho * cp * wT,
+        'LE_W_per_m2': rho * Lv * wq,
+        'tau_N_per_m2': rho * np.hypot(uw, vw),
+    })
 
 
 def tke(
@@ -87,8 +151,11 @@ def tke(
     window_size: int,
     u: str = 'u',
     v: str = 'v',
-    w: str = 'w'
-) -> tuple[list, list]:
+    w: str = 'w',
+    numerically_stable: bool = False,
+    dtype: npt.DTypeLike = np.float64,
+    engine: str = 'numpy'
+) -> tuple[np.ndarray, pd.Index]:
     """
     Calculate Turbulent Kinetic Energy (TKE) in rolling windows.
     
@@ -102,11 +169,19 @@ def tke(
         u: Column name for u-component (east-west wind, m/s)
         v: Column name for v-component (north-south wind, m/s)
         w: Column name for w-component (vertical wind, m/s)
+        numerically_stable: If True, remove the window means before summing
+                            squares instead of using <x²> - <x>²
+        dtype: Floating-point type for the wind data, e.g. np.float32;
+               sums still accumulate in float64
+        engine: 'numpy' (default) or 'numba'. The numba kernel is compiled
+                once per window_size with the window length as a constant;
+                components with missing values, and numerically_stable=True,
+                use the NumPy path.
     
     Returns:
         Tuple of (tke_values, time_midpoints)
-        - tke_values: List of TKE values for each window (m²/s²)
-        - time_midpoints: List of timestamps at the midpoint of each window
+        - tke_values: Array of TKE values for each window (m²/s²)
+        - time_midpoints: Index of timestamps at the midpoint of each window
     
     Examples:
         >>> # For 10 Hz data with 10-minute windows
@@ -115,54 +190,79 @@ def tke(
         >>> # For 20 Hz data with 5-minute windows
         >>> tke_values, times = tke(df, window_size=20*300)
     """
-    tke_list = []
-    time_midpoints = []
-    
-    for i in range(0, len(raw_df), window_size):
-        window = raw_df.iloc[i:i+window_size]
-        
-        # Skip incomplete windows
-        if len(window) < window_size:
-            continue
-        
-        # Compute fluctuations (deviations from mean)
-        u_prime = window[u] - window[u].mean()
-        v_prime = window[v] - window[v].mean()
-        w_prime = window[w] - window[w].mean()
-        
-        # TKE = 0.5 * sum of variances
-        tke_val = 0.5 * (
-            np.var(u_prime, ddof=1) +
-            np.var(v_prime, ddof=1) +
-            np.var(w_prime, ddof=1)
-        )
-        
-        tke_list.append(tke_val)
-        time_midpoints.append(window.index[window_size // 2])
-    
-    return tke_list, time_midpoints
+    # Incomplete trailing window is dropped, so the samples reshape cleanly
+    # into one row per window and each variance is a single axis reduction.
+    n_windows = len(raw_df) // window_size
+    n_samples = n_windows * window_size
+    
+    if engine not in ('numpy', 'numba'):
+        raise ValueError(f"Unknown engine: {engine}. Use 'numpy' or 'numba'")
+    kernel = None
+    if engine == 'numba' and not numerically_stable and n_windows and window_size > 1:
+        kernel = _numba_fixed_window_kernel(window_size)
+    
+    def window_variance(col: str) -> np.ndarray:
+        x = raw_df[col].to_numpy(dtype=dtype)[:n_samples].reshape(n_windows, window_size)
+        if kernel is not None and not np.isnan(x).any():
+            # Sample variance is the covariance of x with itself, times n/(n-1)
+            out = np.empty(n_windows)
+            kernel(x, x, window_size / (window_size - 1), out)
+            return out
+        return _window_variance(x, numerically_stable)
+    
+    # TKE = 0.5 * sum of variances, accumulated in one preallocated array
+    tke_values = np.zeros(n_windows)
+    for col in (u, v, w):
+        tke_values += window_variance(col)
+    tke_values *= 0.5
+    time_midpoints = raw_df.index[window_size // 2:n_samples:window_size]
+    
+    return tke_values, time_midpoints
 
 
 # ============================================================================
 # Internal helper functions (called by ecflux)
 # ============================================================================
 
+def _window_variance(x: np.ndarray, numerically_stable: bool = False) -> np.ndarray:
+    """
+    Internal: Sample variance (ddof=1) of each row of x, ignoring NaNs.
+    
+    var = (sum(x²) - sum(x)²/n) / (n - 1), so each row is read once for the
+    sums instead of once for the mean and again for the deviations.
+    """
+    valid = ~np.isnan(x)
+    n = valid.sum(axis=1)
+    x = np.where(valid, x, 0.0)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if numerically_stable:
+            x = np.where(valid, x - x.sum(axis=1, keepdims=True) / n[:, None], 0.0)
+        sx = x.sum(axis=1, dtype=np.float64)
+        sxx = np.einsum('ij,ij->i', x, x, dtype=np.float64)
+        return (sxx - sx * sx / n) / (n - 1)
+
+
 def _sensible_heat_flux(
     df: pd.DataFrame,
     freq: str,
     var_col: str,
     wind_col: str,
     rho: float,
-    cp: float
+    cp: float,
+    engine: str = 'numpy',
+    numerically_stable: bool = False,
+    dtype: npt.DTypeLike = np.float64,
+    n_jobs: int = 1
 ) -> pd.Series:
     """
     Internal: Compute sensible heat flux (H) using eddy covariance method.
     
     H = rho * cp * <w' T'>
     """
-    from .covariance import covariance_flux
     scale_factor = rho * cp
-    flux = covariance_flux(df, wind_col, var_col, freq, scale_factor)
+    flux = covariance_flux(df, wind_col, var_col, freq, scale_factor,
+                           engine, numerically_stable, dtype, n_jobs)
     flux.name = 'H_W_per_m2'
     return flux
 
@@ -173,48 +273,81 @@ def _latent_heat_flux(
     var_col: str,
     wind_col: str,
     rho: float,
-    Lv: float
+    Lv: float,
+    engine: str = 'numpy',
+    numerically_stable: bool = False,
+    dtype: npt.DTypeLike = np.float64,
+    n_jobs: int = 1
 ) -> pd.Series:
     """
     Internal: Compute latent heat flux (LE) using eddy covariance method.
     
     LE = rho * Lv * <w' q'>
     """
-    from .covariance import covariance_flux
     scale_factor = rho * Lv
-    flux = covariance_flux(df, wind_col, var_col, freq, scale_factor)
+    flux = covariance_flux(df, wind_col, var_col, freq, scale_factor,
+                           engine, numerically_stable, dtype, n_jobs)
     flux.name = 'LE_W_per_m2'
     return flux
 
 
-def _momentum_flux(
-    df: pd.DataFrame,
+# ============================================================================
+# ecflux() dispatch: one adapter per flux type, looked up by normalized name.
+# Each takes ecflux()'s arguments by keyword and ignores those it doesn't use.
+# ============================================================================
+
+def _ecflux_sensible(
+    raw_df: pd.DataFrame,
     freq: str,
-    u_col: str,
-    v_col: str,
-    w_col: str,
-    rho: float
+    *,
+    w: str,
+    scalar: str | None,
+    rho: float,
+    cp: float,
+    options: dict,
+    **_
 ) -> pd.Series:
-    """
-    Internal: Compute momentum flux (tau) using eddy covariance method.
-    
-    tau = rho * sqrt(<u'w'>² + <v'w'>²)
-    """
-    df = df[[u_col, v_col, w_col]].dropna()
-    
-    def compute_tau_window(g):
-        """Compute momentum flux for a single time window."""
-        u_prime = g[u_col] - g[u_col].mean()
-        v_prime = g[v_col] - g[v_col].mean()
-        w_prime = g[w_col] - g[w_col].mean()
-        
-        uw_cov = (u_prime * w_prime).mean()
-        vw_cov = (v_prime * w_prime).mean()
-        
-        tau = rho * np.sqrt(uw_cov**2 + vw_cov**2)
-        return tau
-    
-    tau_series = df.groupby(pd.Grouper(freq=freq)).apply(compute_tau_window)
-    tau_series.name = 'tau_N_per_m2'
-    
-    return tau_series
+    """Internal: ecflux(flux='H'), H = rho * cp * <w' T'>."""
+    if scalar is None:
+        raise ValueError("scalar (temperature) must be specified for sensible heat flux")
+    return _sensible_heat_flux(raw_df, freq, scalar, w, rho, cp, **options)
+
+
+def _ecflux_latent(
+    raw_df: pd.DataFrame,
+    freq: str,
+    *,
+    w: str,
+    scalar: str | None,
+    rho: float,
+    Lv: float,
+    options: dict,
+    **_
+) -> pd.Series:
+    """Internal: ecflux(flux='L'/'LE'), LE = rho * Lv * <w' q'>."""
+    if scalar is None:
+        raise ValueError("scalar (specific humidity) must be specified for latent heat flux")
+    return _latent_heat_flux(raw_df, freq, scalar, w, rho, Lv, **options)
+
+
+def _ecflux_momentum(
+    raw_df: pd.DataFrame,
+    freq: str,
+    *,
+    w: str,
+    rho: float,
+    options: dict,
+    u: str = 'u',
+    v: str = 'v',
+    **_
+) -> pd.Series:
+    """Internal: ecflux(flux='Tau'), tau = rho * sqrt(<u'w'>² + <v'w'>²)."""
+    return _momentum_flux(raw_df, freq, u, v, w, rho, **options)
+
+
+_DISPATCH = {
+    'H': _ecflux_sensible,
+    'L': _ecflux_latent,
+    'LE': _ecflux_latent,
+    'TAU': _ecflux_momentum,
+}
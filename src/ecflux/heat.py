@@ -4,6 +4,8 @@ Sensible heat flux calculations.
 """
 from __future__ import annotations
 
+import warnings
+
 import pandas as pd
 from .covariance import covariance_flux
 
@@ -21,6 +23,8 @@ def sensible_heat_flux(
     """
     Compute sensible heat flux (H) using eddy covariance method.
     
+    Deprecated: use ecflux(df, flux='H', scalar=..., w=...) instead.
+    
     H = rho * cp * <w' T'>
     
     where:
@@ -42,5 +46,10 @@ def sensible_heat_flux(
     Examples:
         >>> H = sensible_heat_flux(df, freq='30T', var_col='T_C', wind_col='W_m_s')
     """
+    warnings.warn(
+        "sensible_heat_flux() is deprecated, use ecflux(df, flux='H', ...) instead",
+        DeprecationWarning,
+        stacklevel=2,
+    )
     scale_factor = rho * cp
     return covariance_flux(df, wind_col, var_col, freq, scale_factor)
@@ -4,8 +4,10 @@ Momentum flux (wind stress) calculations.
 """
 from __future__ import annotations
 
-import numpy as np
+import warnings
+
 import pandas as pd
+from .covariance import _momentum_flux
 
 __all__ = ["momentum_flux"]
 
@@ -21,6 +23,8 @@ def momentum_flux(
     """
     Compute momentum flux (tau) using eddy covariance method.
     
+    Deprecated: use ecflux(df, flux='Tau', u=..., v=..., w=...) instead.
+    
     tau = rho * sqrt(<u'w'>² + <v'w'>²)
     
     where:
@@ -42,21 +46,9 @@ def momentum_flux(
     Examples:
         >>> tau = momentum_flux(df, freq='30T', u_col='U_m_s', v_col='V_m_s', w_col='W_m_s')
     """
-    df = df[[u_col, v_col, w_col]].dropna()
-    
-    def compute_tau_window(g):
-        """Compute momentum flux for a single time window."""
-        u_prime = g[u_col] - g[u_col].mean()
-        v_prime = g[v_col] - g[v_col].mean()
-        w_prime = g[w_col] - g[w_col].mean()
-        
-        uw_cov = (u_prime * w_prime).mean()
-        vw_cov = (v_prime * w_prime).mean()
-        
-        tau = rho * np.sqrt(uw_cov**2 + vw_cov**2)
-        return tau
-    
-    tau_series = df.groupby(pd.Grouper(freq=freq)).apply(compute_tau_window)
-    tau_series.name = 'tau_N_per_m2'
-    
-    return tau_series
+    warnings.warn(
+        "momentum_flux() is deprecated, use ecflux(df, flux='Tau', ...) instead",
+        DeprecationWarning,
+        stacklevel=2,
+    )
+    return _momentum_flux(df, freq, u_col, v_col, w_col, rho)
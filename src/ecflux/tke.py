@@ -6,6 +6,7 @@ from __future__ import annotations
 
 import numpy as np
 import pandas as pd
+from .flux import tke as _tke
 
 __all__ = ["tke"]
 
@@ -16,7 +17,7 @@ def tke(
     u_col: str = 'u',
     v_col: str = 'v',
     w_col: str = 'w'
-) -> tuple[list, list]:
+) -> tuple[np.ndarray, pd.Index]:
     """
     Calculate Turbulent Kinetic Energy (TKE) in rolling windows.
     
@@ -31,8 +32,8 @@ def tke(
     
     Returns:
         Tuple of (tke_values, time_midpoints)
-        - tke_values: List of TKE values for each window (m²/s²)
-        - time_midpoints: List of timestamps at the midpoint of each window
+        - tke_values: Array of TKE values for each window (m²/s²)
+        - time_midpoints: Index of timestamps at the midpoint of each window
     
     Examples:
         >>> # For 10 Hz data with 10-minute windows
@@ -41,29 +42,4 @@ def tke(
         >>> # For 32 Hz data with 10-minute windows
         >>> tke_values, times = tke(df, window_size=32*600)
     """
-    tke_list = []
-    time_midpoints = []
-    
-    for i in range(0, len(df), window_size):
-        window = df.iloc[i:i+window_size]
-        
-        # Skip incomplete windows
-        if len(window) < window_size:
-            continue
-        
-        # Compute fluctuations (deviations from mean)
-        u_prime = window[u_col] - window[u_col].mean()
-        v_prime = window[v_col] - window[v_col].mean()
-        w_prime = window[w_col] - window[w_col].mean()
-        
-        # TKE = 0.5 * sum of variances
-        tke = 0.5 * (
-            np.var(u_prime, ddof=1) +
-            np.var(v_prime, ddof=1) +
-            np.var(w_prime, ddof=1)
-        )
-        
-        tke_list.append(tke)
-        time_midpoints.append(window.index[window_size // 2])
-    
-    return tke_list, time_midpoints
+    return _tke(df, window_size, u=u_col, v=v_col, w=w_col)
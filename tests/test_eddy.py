@@ -0,0 +1,29 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+"""
+Check fluctuations() against per-column demeaning.
+"""
+from __future__ import annotations
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from ecflux import fluctuations
+
+
+def test_fluctuations_keeps_dtype_and_is_quiet():
+    index = pd.date_range('2024-01-01', periods=5, freq='1s')
+    df = pd.DataFrame({
+        'u': np.array([1, 2, np.nan, 4, 5], dtype=np.float32),
+        'T': np.nan,
+        'n': np.arange(5),
+    }, index=index)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        result = fluctuations(df)
+    assert list(result.columns) == ['u_prime', 'T_prime', 'n_prime']
+    assert result['u_prime'].dtype == np.float32
+    assert result['T_prime'].isna().all()
+    np.testing.assert_array_equal(result['u_prime'], [-2, -1, np.nan, 1, 2])
+    np.testing.assert_array_equal(result['n_prime'], np.arange(5) - 2.0)
@@ -0,0 +1,120 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+"""
+Check that every engine reproduces the resample-based window averages.
+"""
+from __future__ import annotations
+
+import importlib.util
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ecflux import covariance_flux, ecflux
+
+ENGINES = ['numpy'] + [
+    name for name in ('polars', 'numba') if importlib.util.find_spec(name)
+]
+FREQS = ['30min', '25min', '7min', '7h', '1D']
+
+
+@pytest.fixture
+def raw_df() -> pd.DataFrame:
+    """Two days of 1 Hz data with a gap and some missing values."""
+    rng = np.random.default_rng(42)
+    n = 2 * 86400
+    index = pd.date_range('2024-01-02 00:00:30', periods=n, freq='1s')
+    df = pd.DataFrame({
+        'u': 3 + rng.normal(size=n),
+        'v': 1 + rng.normal(size=n),
+        'w': 0.3 * rng.normal(size=n),
+        'T': 20 + rng.normal(size=n),
+    }, index=index)
+    df['T'] += 0.5 * df['w']
+    df.iloc[5000:5100, df.columns.get_loc('T')] = np.nan
+    return df.drop(df.index[40000:50000])
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('freq', FREQS)
+def test_covariance_matches_pandas(raw_df, engine, freq):
+    expected = covariance_flux(raw_df, 'w', 'T', freq=freq, engine='pandas')
+    result = covariance_flux(raw_df, 'w', 'T', freq=freq, engine=engine)
+    pd.testing.assert_series_equal(result, expected, rtol=1e-9, check_freq=False)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('freq', FREQS)
+def test_momentum_matches_pandas(raw_df, engine, freq):
+    expected = ecflux(raw_df, flux='Tau', freq=freq, engine='pandas')
+    result = ecflux(raw_df, flux='Tau', freq=freq, engine=engine)
+    pd.testing.assert_series_equal(result, expected, rtol=1e-9, check_freq=False)
+
+
+@pytest.mark.parametrize('engine', ENGINES + ['pandas'])
+@pytest.mark.parametrize('freq', ['30min', '7h'])
+@pytest.mark.parametrize('offset', [0.0, 1.0])
+def test_numerically_stable_matches_plain(raw_df, engine, freq, offset):
+    expected = covariance_flux(raw_df, 'w', 'T', freq=freq, engine='pandas')
+    # With means this large <wT> - <w><T> loses most of its digits (off by
+    # ~1e-5 here); covariances don't depend on the means, so the stable
+    # path must still match
+    shifted = raw_df.assign(w=raw_df['w'] + 1e3 * offset,
+                            T=raw_df['T'] + 1e7 * offset)
+    result = covariance_flux(shifted, 'w', 'T', freq=freq, engine=engine,
+                             numerically_stable=True)
+    pd.testing.assert_series_equal(result, expected, rtol=1e-9, check_freq=False)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_calendar_freq_falls_back_to_pandas(raw_df, engine):
+    expected = covariance_flux(raw_df, 'w', 'T', freq='ME', engine='pandas')
+    result = covariance_flux(raw_df, 'w', 'T', freq='ME', engine=engine)
+    pd.testing.assert_series_equal(result, expected)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('freq', ['1h', '30min'])
+def test_autumn_dst_change(engine, freq):
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2024-10-26', '2024-10-28', freq='10s',
+                          tz='Europe/Berlin', inclusive='left')
+    df = pd.DataFrame({
+        'w': rng.normal(size=len(index)),
+        'T': rng.normal(size=len(index)),
+    }, index=index)
+    expected = covariance_flux(df, 'w', 'T', freq=freq, engine='pandas')
+    result = covariance_flux(df, 'w', 'T', freq=freq, engine=engine)
+    pd.testing.assert_series_equal(result, expected, rtol=1e-9, check_freq=False)
+
+
+@pytest.mark.parametrize('n_jobs', [0, -2, 1.5])
+def test_invalid_n_jobs(raw_df, n_jobs):
+    with pytest.raises(ValueError, match='n_jobs'):
+        ecflux(raw_df, w='w', scalar='T', flux='H', n_jobs=n_jobs)
+
+
+@pytest.mark.parametrize('engine', ENGINES + ['pandas'])
+@pytest.mark.parametrize('freq', ['30min', '7h'])
+@pytest.mark.parametrize('leading', [4000, 86400])
+def test_empty_edge_windows_are_dropped(raw_df, engine, freq, leading):
+    # 86400 rows leave the whole first day invalid, which moves the origin
+    # of windows that do not divide 24h to the second day
+    raw_df.iloc[:leading, raw_df.columns.get_loc('w')] = np.nan
+    raw_df.iloc[-2500:, raw_df.columns.get_loc('T')] = np.nan
+    expected = covariance_flux(raw_df.dropna(), 'w', 'T', freq=freq, engine='pandas')
+    result = covariance_flux(raw_df, 'w', 'T', freq=freq, engine=engine)
+    pd.testing.assert_series_equal(result, expected, rtol=1e-9, check_freq=False)
+
+
+@pytest.mark.parametrize('engine', ENGINES + ['pandas'])
+@pytest.mark.parametrize('freq', ['ME', '1D'])
+def test_float32_sums_in_float64(raw_df, engine, freq):
+    # Large means, as with temperatures in K, expose float32 accumulation
+    raw_df['T'] += 273.15
+    raw_df['w'] += 0.2
+    expected = covariance_flux(raw_df, 'w', 'T', freq=freq, engine=engine)
+    result = covariance_flux(raw_df, 'w', 'T', freq=freq, engine=engine,
+                             dtype=np.float32)
+    assert result.dtype == np.float64
+    pd.testing.assert_series_equal(result, expected, rtol=1e-4, check_freq=False)
@@ -0,0 +1,91 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+"""
+Check the high-level flux functions against separate calls and references.
+"""
+from __future__ import annotations
+
+import importlib.util
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ecflux import ecflux, ecflux_all, tke
+
+COLUMNS = dict(w='w', T='T', q='q', u='u', v='v')
+TKE_ENGINES = ['numpy'] + (['numba'] if importlib.util.find_spec('numba') else [])
+
+
+@pytest.fixture
+def raw_df() -> pd.DataFrame:
+    """Six hours of 10 Hz wind, temperature and humidity without gaps."""
+    rng = np.random.default_rng(7)
+    n = 6 * 3600 * 10
+    index = pd.date_range('2024-06-01 00:00:00', periods=n, freq='100ms')
+    df = pd.DataFrame({
+        'u': 3 + rng.normal(size=n),
+        'v': 1 + rng.normal(size=n),
+        'w': 0.3 * rng.normal(size=n),
+        'T': 293 + rng.normal(size=n),
+        'q': 0.01 + 1e-3 * rng.normal(size=n),
+    }, index=index)
+    df['T'] += 0.5 * df['w']
+    df['q'] += 1e-3 * df['w']
+    return df
+
+
+def separate_fluxes(df: pd.DataFrame) -> list[pd.Series]:
+    return [
+        ecflux(df, w='w', scalar='T', flux='H', freq='30min'),
+        ecflux(df, w='w', scalar='q', flux='LE', freq='30min'),
+        ecflux(df, w='w', flux='Tau', freq='30min', u='u', v='v'),
+    ]
+
+
+def test_ecflux_all_matches_ecflux_without_gaps(raw_df):
+    result = ecflux_all(raw_df, freq='30min', **COLUMNS)
+    assert list(result.columns) == ['H_W_per_m2', 'LE_W_per_m2', 'tau_N_per_m2']
+    for expected in separate_fluxes(raw_df):
+        pd.testing.assert_series_equal(result[expected.name], expected,
+                                       rtol=1e-12, check_freq=False)
+
+
+def test_ecflux_all_drops_rows_missing_any_column(raw_df):
+    # Gaps in q only: ecflux(flux='H') keeps those rows, ecflux_all doesn't
+    raw_df.iloc[1000:30000, raw_df.columns.get_loc('q')] = np.nan
+    result = ecflux_all(raw_df, freq='30min', **COLUMNS)
+
+    H, LE, tau = separate_fluxes(raw_df)
+    pd.testing.assert_series_equal(result['LE_W_per_m2'], LE, rtol=1e-12, check_freq=False)
+    assert not np.allclose(result['H_W_per_m2'], H, rtol=1e-9)
+
+    # ...and matches separate calls once those rows are dropped up front
+    for expected in separate_fluxes(raw_df.dropna()):
+        pd.testing.assert_series_equal(result[expected.name], expected,
+                                       rtol=1e-12, check_freq=False)
+
+
+def reference_tke(df: pd.DataFrame, window_size: int) -> tuple[np.ndarray, pd.Index]:
+    """Two-pass TKE over full windows, skipping NaNs like Series.var()."""
+    values, midpoints = [], []
+    for start in range(0, len(df) - window_size + 1, window_size):
+        window = df.iloc[start:start + window_size]
+        values.append(0.5 * sum(np.nanvar(window[c].to_numpy(), ddof=1) for c in 'uvw'))
+        midpoints.append(df.index[start + window_size // 2])
+    return np.array(values), pd.DatetimeIndex(midpoints)
+
+
+@pytest.mark.parametrize('engine', TKE_ENGINES)
+@pytest.mark.parametrize('numerically_stable', [False, True])
+@pytest.mark.parametrize('with_nans', [False, True])
+def test_tke_matches_two_pass_variance(raw_df, engine, numerically_stable, with_nans):
+    # 6000 samples per window with a trailing partial window of 1234 samples
+    df = raw_df.iloc[:20 * 6000 + 1234]
+    if with_nans:
+        df = df.copy()
+        df.iloc[500:700, df.columns.get_loc('w')] = np.nan
+    expected, midpoints = reference_tke(df, 6000)
+    result, times = tke(df, 6000, numerically_stable=numerically_stable, engine=engine)
+    assert len(result) == 20
+    np.testing.assert_allclose(result, expected, rtol=1e-9)
+    pd.testing.assert_index_equal(times, midpoints, check_exact=True)